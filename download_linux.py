@@ -5,18 +5,163 @@ Linux发行版下载器
 用于下载、更新和验证各种Linux发行版的ISO文件
 """
 
+import atexit
 import json
 import os
+import re
 import sys
 import hashlib
+import mmap
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
+# 流式下载的分块大小，较大的块可以减少write()系统调用和进度条刷新次数
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# 写入ISO文件时使用的缓冲区大小
+DOWNLOAD_WRITE_BUFFER = 1024 * 1024
+# 进度条每累积这么多字节或经过这么长时间（秒）才刷新一次
+PROGRESS_UPDATE_BYTES = 1024 * 1024
+PROGRESS_UPDATE_INTERVAL = 0.1
+# 下载中断时的最大尝试次数，以及指数退避的初始等待时间（秒）
+DOWNLOAD_MAX_ATTEMPTS = 5
+DOWNLOAD_RETRY_BACKOFF = 2
+# 计算校验和时每次读取的大小（仅在不支持hashlib.file_digest时使用）
+HASH_READ_SIZE = 1024 * 1024
+# 下载目录中保存已计算SHA256的缓存文件名
+VERIFY_CACHE_NAME = '.iso_verify_cache.json'
+# 下载目录中记录未完成下载对应资源版本（ETag/Last-Modified）的文件名
+RESUME_STATE_NAME = '.iso_resume_state.json'
+# 仅在这些传输层错误时重试续传；HTTP错误（如404）直接失败
+TRANSIENT_DOWNLOAD_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+# 小于该大小的文件使用mmap计算校验和
+MMAP_HASH_MAX_SIZE = 2**40
+# 获取校验和文件失败后，在该时间（秒）内不再重复请求同一URL
+CHECKSUM_FAILURE_TTL = 60
+# 删除所有十六进制字符的转换表，用于快速判断字符串是否为纯十六进制
+_NON_HEX = str.maketrans('', '', '0123456789abcdefABCDEF')
+
+
+def _is_sha256_hex(value: str) -> bool:
+    """判断字符串是否为有效的SHA256校验和（64位十六进制）"""
+    return len(value) == 64 and not value.translate(_NON_HEX)
+
+
+def _load_json_dict(path: Path) -> Dict[str, str]:
+    """读取JSON对象文件，文件不存在或损坏时返回空字典"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_json_atomic(path: Path, data: Dict[str, str]) -> None:
+    """先写入临时文件再替换，避免写入中途失败留下损坏的文件"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+# 解析206响应的Content-Range起始位置，例如 "bytes 1000-1999/2000"
+_CONTENT_RANGE_RE = re.compile(r'^\s*bytes\s+(\d+)-')
+
+
+def _response_validator(headers) -> Optional[str]:
+    """取出可用于If-Range的资源版本标识：优先强ETag，其次Last-Modified"""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified') or None
+
+
+def _sha256_hasher(filepath: Path):
+    """返回已读入整个文件内容的SHA256对象"""
+    with open(filepath, "rb") as f:
+        fd = f.fileno()
+        # 提示内核顺序读取以加大预读；读完后释放页缓存，避免大ISO挤占其他程序的缓存
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        try:
+            return _sha256_from_fd(f)
+        finally:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def _sha256_from_fd(f):
+    """对已打开的文件计算SHA256，优先使用mmap一次性交给OpenSSL处理"""
+    size = os.fstat(f.fileno()).st_size
+    # 64位系统上直接映射整个文件，一次update调用即可完成哈希，由内核负责预读
+    if 0 < size < MMAP_HASH_MAX_SIZE and sys.maxsize > 2**32:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            return hashlib.sha256(mm)
+    
+    if hasattr(hashlib, "file_digest"):
+        # Python 3.11+: 读取与哈希循环都在C层完成，可使用OpenSSL的硬件加速实现
+        return hashlib.file_digest(f, "sha256")
+    
+    sha256_hash = hashlib.sha256()
+    buffer = bytearray(HASH_READ_SIZE)
+    view = memoryview(buffer)
+    while True:
+        read_size = f.readinto(buffer)
+        if not read_size:
+            break
+        sha256_hash.update(view[:read_size])
+    return sha256_hash
+
+
+def _sha256_file(filepath: Path) -> str:
+    """计算文件的SHA256十六进制字符串"""
+    return _sha256_hasher(filepath).hexdigest()
+
+
+# 匹配两种校验和行格式：
+#   SHA256 (filename) = checksum   （Fedora等PGP签名的CHECKSUM文件）
+#   checksum  filename / checksum *filename   （sha256sum输出格式）
+_CHECKSUM_LINE_RE = re.compile(
+    r'^[ \t]*(?:SHA256[ \t]*\(([^)]+)\)[ \t]*=[ \t]*(\S+)|(\S+)[ \t]+\*?(.+?))[ \t]*\r?$',
+    re.MULTILINE,
+)
+_PGP_HEADER_RE = re.compile(r'^-----BEGIN PGP SIGNED MESSAGE-----.*?\r?\n\r?\n', re.DOTALL)
+_PGP_SIGNATURE_MARKER = '-----BEGIN PGP SIGNATURE-----'
+
+
+def _parse_checksum_file(text: str) -> Dict[str, str]:
+    """解析校验和文件，返回 {文件名: 小写SHA256} 映射，支持PGP签名包裹的内容"""
+    # 去掉PGP签名头部和尾部的签名块，只保留被签名的正文
+    text = _PGP_HEADER_RE.sub('', text, count=1)
+    signature_start = text.find(_PGP_SIGNATURE_MARKER)
+    if signature_start != -1:
+        text = text[:signature_start]
+    
+    digests: Dict[str, str] = {}
+    for match in _CHECKSUM_LINE_RE.finditer(text):
+        if match.group(1) is not None:
+            name, checksum = match.group(1), match.group(2)
+        else:
+            checksum, name = match.group(3), match.group(4)
+        if _is_sha256_hex(checksum):
+            digests.setdefault(name.rsplit('/', 1)[-1], checksum.lower())
+    return digests
+
 
 class LinuxDistributionDownloader:
     def __init__(self, json_file: str = "distributions.json", download_dir: str = None):
@@ -34,6 +179,11 @@ class LinuxDistributionDownloader:
         self.download_dir.mkdir(exist_ok=True)
         self.distributions = self.load_distributions()
         
+        # 按小写发行版名称建立索引，避免每次查找都线性扫描全部条目
+        self._by_name: Dict[str, List[Dict]] = {}
+        for dist in self.distributions["distributions"]:
+            self._by_name.setdefault(dist["distribution"].lower(), []).append(dist)
+        
         # 设置请求头，模拟真实浏览器
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -44,17 +194,119 @@ class LinuxDistributionDownloader:
             'Upgrade-Insecure-Requests': '1',
         }
         
+        # 复用同一个Session，保持连接池与keep-alive，避免每次请求重新握手
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+            ),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # 校验和文件缓存：checksum_url -> {文件名: SHA256}，以及最近失败的URL
+        self._checksum_cache: Dict[str, Dict[str, str]] = {}
+        self._checksum_failures: Dict[str, float] = {}
+        
+        # 已计算过的文件SHA256缓存，键为"路径|大小|修改时间"，文件变化后自动失效
+        self._verify_cache_path = self.download_dir / VERIFY_CACHE_NAME
+        self._verify_cache = self._load_verify_cache()
+        self._verify_cache_lock = threading.Lock()
+        self._verify_cache_dirty = False
+        atexit.register(self._save_verify_cache)
+        
+        # 未完成下载的资源版本，续传时通过If-Range确认服务器上的文件没有被替换
+        self._resume_state_path = self.download_dir / RESUME_STATE_NAME
+        self._resume_state = _load_json_dict(self._resume_state_path)
+        self._resume_state_lock = threading.Lock()
+        
     def load_distributions(self) -> Dict:
         """加载发行版信息"""
         try:
             with open(self.json_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                data = json.load(f)
         except FileNotFoundError:
             print(f"错误: 找不到文件 {self.json_file}")
             sys.exit(1)
         except json.JSONDecodeError:
             print(f"错误: {self.json_file} 不是有效的JSON文件")
             sys.exit(1)
+        
+        # 预先解析下载链接中的文件名，后续列出、下载和清理时直接复用
+        for dist in data["distributions"]:
+            dist["_filename"] = os.path.basename(urlparse(dist["download_url"]).path)
+        return data
+    
+    def _load_verify_cache(self) -> Dict[str, str]:
+        """加载校验和缓存，文件不存在或损坏时返回空缓存"""
+        return _load_json_dict(self._verify_cache_path)
+    
+    def _save_verify_cache(self) -> None:
+        """保存校验和缓存，只保留仍与磁盘文件一致的条目"""
+        with self._verify_cache_lock:
+            if not self._verify_cache_dirty:
+                return
+            self._verify_cache_dirty = False
+            cache = {}
+            for key, checksum in self._verify_cache.items():
+                path = key.rsplit('|', 2)[0]
+                try:
+                    if self._verify_cache_key(Path(path)) == key:
+                        cache[key] = checksum
+                except OSError:
+                    continue
+        try:
+            _write_json_atomic(self._verify_cache_path, cache)
+        except OSError as e:
+            print(f"保存校验和缓存失败: {e}")
+    
+    def _get_resume_validator(self, filepath: Path) -> Optional[str]:
+        with self._resume_state_lock:
+            return self._resume_state.get(str(filepath.resolve()))
+    
+    def _set_resume_validator(self, filepath: Path, validator: Optional[str]) -> None:
+        """记录或清除部分文件对应的资源版本，立即落盘以便中断后下次运行使用"""
+        key = str(filepath.resolve())
+        with self._resume_state_lock:
+            if validator:
+                if self._resume_state.get(key) == validator:
+                    return
+                self._resume_state[key] = validator
+            elif self._resume_state.pop(key, None) is None:
+                return
+            try:
+                _write_json_atomic(self._resume_state_path, dict(self._resume_state))
+            except OSError as e:
+                print(f"保存续传状态失败: {e}")
+    
+    @staticmethod
+    def _verify_cache_key(filepath: Path) -> str:
+        st = filepath.stat()
+        return f"{filepath.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+    
+    def _remember_sha256(self, filepath: Path, checksum: str,
+                         key: Optional[str] = None) -> None:
+        """记录文件当前状态对应的SHA256"""
+        if key is None:
+            key = self._verify_cache_key(filepath)
+        with self._verify_cache_lock:
+            self._verify_cache[key] = checksum
+            self._verify_cache_dirty = True
+    
+    def _cached_sha256(self, filepath: Path) -> str:
+        """获取文件的SHA256，文件未变化时直接使用缓存结果"""
+        key = self._verify_cache_key(filepath)
+        with self._verify_cache_lock:
+            cached = self._verify_cache.get(key)
+        if cached:
+            return cached
+        checksum = _sha256_file(filepath)
+        self._remember_sha256(filepath, checksum, key)
+        return checksum
     
     def list_distributions(self, filter_name: Optional[str] = None, 
                           filter_type: Optional[str] = None) -> None:
@@ -62,15 +314,8 @@ class LinuxDistributionDownloader:
         print("可用的操作系统发行版:")
         print("=" * 80)
         
-        # 按发行版名称分组
-        dist_groups = {}
-        for dist in self.distributions["distributions"]:
-            dist_name = dist["distribution"]
-            if dist_name not in dist_groups:
-                dist_groups[dist_name] = []
-            dist_groups[dist_name].append(dist)
-        
-        for dist_name, dists in dist_groups.items():
+        for dists in self._by_name.values():
+            dist_name = dists[0]["distribution"]
             # 应用名称过滤器
             if filter_name and filter_name.lower() not in dist_name.lower():
                 continue
@@ -85,83 +330,68 @@ class LinuxDistributionDownloader:
             if len(dists) > 1:
                 print("可用版本:")
                 for i, dist in enumerate(dists, 1):
-                    filename = os.path.basename(urlparse(dist["download_url"]).path)
+                    filename = dist["_filename"]
                     print(f"  {i}. {filename}")
             else:
-                filename = os.path.basename(urlparse(dists[0]["download_url"]).path)
+                filename = dists[0]["_filename"]
                 print(f"版本: {filename}")
             
             print(f"下载链接: {dists[0]['download_url']}")
             print("-" * 80)
     
-    def get_checksum_from_url(self, checksum_url: str, filename: str) -> Optional[str]:
-        """从校验和URL获取指定文件的校验和"""
+    def _fetch_checksum_map(self, checksum_url: str) -> Optional[Dict[str, str]]:
+        """获取并解析校验和文件，同一URL在本次运行中只请求一次"""
+        cached = self._checksum_cache.get(checksum_url)
+        if cached is not None:
+            return cached
+        
+        # 短时间内失败过的URL不再重复请求，避免反复访问不可用的镜像
+        failed_at = self._checksum_failures.get(checksum_url)
+        if failed_at is not None and time.monotonic() - failed_at < CHECKSUM_FAILURE_TTL:
+            return None
+        
         try:
-            response = requests.get(checksum_url, headers=self.headers, timeout=30)
+            response = self.session.get(checksum_url, timeout=30)
             response.raise_for_status()
-            
-            checksum_content = response.text
-            
-            # 处理PGP签名的CHECKSUM格式
-            lines = checksum_content.split('\n')
-            in_pgp_section = False
-            pgp_lines = []
-            
-            for line in lines:
-                line = line.strip()
-                
-                # 检测PGP签名开始
-                if line.startswith('-----BEGIN PGP SIGNED MESSAGE-----'):
-                    in_pgp_section = True
-                    continue
-                
-                # 检测PGP签名结束
-                if line.startswith('-----BEGIN PGP SIGNATURE-----'):
-                    in_pgp_section = False
-                    break
-                
-                # 如果在PGP签名区域内，收集内容
-                if in_pgp_section and line and not line.startswith('Hash:'):
-                    pgp_lines.append(line)
-            
-            # 如果有PGP内容，使用PGP内容；否则使用原始内容
-            content_to_parse = '\n'.join(pgp_lines) if pgp_lines else checksum_content
-            
-            # 查找对应的校验和
-            for line in content_to_parse.split('\n'):
-                if filename in line:
-                    # 处理标准格式: checksum filename
-                    parts = line.strip().split()
-                    if len(parts) >= 2:
-                        potential_checksum = parts[0]
-                        # 验证是否为有效的SHA256校验和（64位十六进制）
-                        if len(potential_checksum) == 64 and all(c in '0123456789abcdefABCDEF' for c in potential_checksum):
-                            return potential_checksum.lower()
-                    
-                    # 处理PGP签名格式: SHA256 (filename) = checksum
-                    if 'SHA256' in line and filename in line and '=' in line:
-                        # 提取等号后面的校验和
-                        checksum_part = line.split('=')[1].strip()
-                        if len(checksum_part) == 64 and all(c in '0123456789abcdefABCDEF' for c in checksum_part):
-                            return checksum_part.lower()
-            return None
-            
+            digests = _parse_checksum_file(response.text)
         except Exception as e:
             print(f"  从URL获取校验和失败: {e}")
+            self._checksum_failures[checksum_url] = time.monotonic()
             return None
+        
+        self._checksum_cache[checksum_url] = digests
+        self._checksum_failures.pop(checksum_url, None)
+        return digests
+    
+    def get_checksum_from_url(self, checksum_url: str, filename: str) -> Optional[str]:
+        """从校验和URL获取指定文件的校验和"""
+        digests = self._fetch_checksum_map(checksum_url)
+        if digests is None:
+            return None
+        return digests.get(filename)
     
     def verify_checksum_smart(self, filepath: Path, checksum_url: Optional[str], 
-                             stored_checksum: Optional[str]) -> tuple[bool, str]:
-        """智能校验和验证，按优先级进行"""
+                             stored_checksum: Optional[str],
+                             precomputed_checksum: Optional[str] = None) -> tuple[bool, str]:
+        """智能校验和验证，按优先级进行
+        
+        如果提供了precomputed_checksum（下载时边写边算出的SHA256），直接比较字符串，
+        不再重新读取整个文件。
+        """
         filename = filepath.name
         
+        def matches(expected: str) -> bool:
+            if precomputed_checksum is not None:
+                return precomputed_checksum == expected
+            return self.verify_checksum(filepath, expected)
+        
         # 第一优先级：从checksum_url获取最新校验和
         if checksum_url:
             print(f"  尝试从URL获取最新校验和: {checksum_url}")
             url_checksum = self.get_checksum_from_url(checksum_url, filename)
             if url_checksum:
                 print(f"  从URL获取到校验和: {url_checksum}")
-                if self.verify_checksum(filepath, url_checksum):
+                if matches(url_checksum):
                     return True, f"URL校验和验证通过: {url_checksum}"
                 else:
                     print(f"  URL校验和验证失败")
@@ -169,7 +399,7 @@ class LinuxDistributionDownloader:
         # 第二优先级：使用JSON中存储的checksum
         if stored_checksum:
             print(f"  使用存储的校验和: {stored_checksum}")
-            if self.verify_checksum(filepath, stored_checksum):
+            if matches(stored_checksum):
                 return True, f"存储校验和验证通过: {stored_checksum}"
             else:
                 print(f"  存储校验和验证失败")
@@ -186,11 +416,13 @@ class LinuxDistributionDownloader:
         if not dist_dir.exists():
             return
         
-        # 获取目录中的所有文件
-        existing_files = [f.name for f in dist_dir.iterdir() if f.is_file()]
+        # 获取目录中的所有文件（scandir直接使用目录项类型，无需逐个stat）
+        with os.scandir(dist_dir) as entries:
+            existing_files = [e.name for e in entries if e.is_file(follow_symlinks=False)]
         
         # 找出需要删除的文件
-        files_to_delete = [f for f in existing_files if f not in expected_files]
+        expected = set(expected_files)
+        files_to_delete = [f for f in existing_files if f not in expected]
         
         if files_to_delete:
             print(f"  清理目录 {dist_dir.name}，删除 {len(files_to_delete)} 个过时文件:")
@@ -204,13 +436,106 @@ class LinuxDistributionDownloader:
         else:
             print(f"  目录 {dist_dir.name} 无需清理")
     
-    def download_distribution(self, name: str, verify_checksum: bool = True) -> bool:
+    def _download_file(self, url: str, filepath: Path, filename: str,
+                       position: Optional[int] = None) -> str:
+        """下载文件并返回其SHA256，传输中断时按指数退避重试并从断点续传"""
+        for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+            # 只使用写入部分文件时记录的版本；没有记录就无法确认本地字节的来源，不续传
+            if_range = self._get_resume_validator(filepath)
+            try:
+                checksum = self._download_once(url, filepath, filename, position, if_range)
+            except TRANSIENT_DOWNLOAD_ERRORS as e:
+                if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                    raise
+                delay = DOWNLOAD_RETRY_BACKOFF * 2 ** (attempt - 1)
+                print(f"\n下载中断: {e}，{delay:.0f} 秒后续传（第 {attempt} 次重试）")
+                time.sleep(delay)
+                continue
+            self._set_resume_validator(filepath, None)
+            return checksum
+    
+    def _download_once(self, url: str, filepath: Path, filename: str,
+                       position: Optional[int], if_range: Optional[str] = None) -> str:
+        """执行一次下载请求，本地已有部分文件时使用Range请求追加剩余内容"""
+        # 没有记录的资源版本时从头下载，避免把新文件的尾部拼接到旧文件上
+        offset = filepath.stat().st_size if filepath.exists() and if_range else 0
+        # 禁用压缩，保证Range偏移与本地文件字节一一对应
+        headers = {'Accept-Encoding': 'identity'}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            # 服务器上的文件已被替换时，If-Range不匹配会返回200完整内容而不是206
+            headers['If-Range'] = if_range
+        
+        with self.session.get(url, headers=headers, stream=True, timeout=30) as response:
+            if offset and response.status_code == 416:
+                # 请求的范围超出文件末尾，说明本地文件已经完整
+                return self._cached_sha256(filepath)
+            response.raise_for_status()
+            
+            if response.status_code != 206:
+                # 服务器不支持Range或文件已变化，从头开始下载
+                self._set_resume_validator(filepath, _response_validator(response.headers))
+                return self._write_response(response, filepath, filename, position, 0)
+            
+            match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+            if match and int(match.group(1)) == offset:
+                return self._write_response(response, filepath, filename, position, offset)
+        
+        # 返回的范围与本地文件末尾不一致，无法安全追加，改为从头下载
+        print(f"\n服务器返回的范围与本地文件不一致，重新下载: {filename}")
+        self._set_resume_validator(filepath, None)
+        return self._download_once(url, filepath, filename, position)
+    
+    def _write_response(self, response: requests.Response, filepath: Path, filename: str,
+                        position: Optional[int], offset: int) -> str:
+        """将响应内容写入文件并返回整个文件的SHA256；offset大于0时追加到已有内容之后"""
+        if offset:
+            # 续传：先对已下载的部分计算哈希，再继续追加
+            mode = 'ab'
+            sha256_hash = _sha256_hasher(filepath)
+        else:
+            mode = 'wb'
+            # 下载时同步计算SHA256，避免下载完成后再完整读取一遍文件
+            sha256_hash = hashlib.sha256()
+        
+        total_size = offset + int(response.headers.get('content-length', 0))
+        
+        # 使用tqdm创建进度条
+        with open(filepath, mode, buffering=DOWNLOAD_WRITE_BUFFER) as f:
+            with tqdm(
+                total=total_size,
+                initial=offset,
+                unit='B',
+                unit_scale=True,
+                unit_divisor=1024,
+                desc=f"下载 {filename}",
+                position=position,
+                bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]'
+            ) as pbar:
+                # 累积一定字节数或时间后再刷新进度条，减少tqdm的加锁与重绘开销
+                pending = 0
+                last_update = time.monotonic()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        sha256_hash.update(chunk)
+                        pending += len(chunk)
+                        now = time.monotonic()
+                        if (pending >= PROGRESS_UPDATE_BYTES
+                                or now - last_update >= PROGRESS_UPDATE_INTERVAL):
+                            pbar.update(pending)
+                            pending = 0
+                            last_update = now
+                if pending:
+                    pbar.update(pending)
+        
+        return sha256_hash.hexdigest()
+    
+    def download_distribution(self, name: str, verify_checksum: bool = True,
+                              position: Optional[int] = None) -> bool:
         """下载指定的发行版"""
         # 查找匹配的发行版
-        matching_dists = []
-        for dist in self.distributions["distributions"]:
-            if dist["distribution"].lower() == name.lower():
-                matching_dists.append(dist)
+        matching_dists = self._by_name.get(name.lower(), [])
         
         if not matching_dists:
             print(f"错误: 找不到匹配的发行版 {name}")
@@ -219,10 +544,7 @@ class LinuxDistributionDownloader:
         print(f"找到 {len(matching_dists)} 个 {name} 发行版，开始下载所有版本...")
         
         # 准备清理：收集所有应该存在的文件名
-        expected_files = []
-        for dist in matching_dists:
-            filename = os.path.basename(urlparse(dist["download_url"]).path)
-            expected_files.append(filename)
+        expected_files = [dist["_filename"] for dist in matching_dists]
         
         # 下载所有匹配的版本
         success_count = 0
@@ -235,51 +557,42 @@ class LinuxDistributionDownloader:
             dist_dir.mkdir(parents=True, exist_ok=True)
             
             # 获取文件名
-            filename = os.path.basename(urlparse(target_dist["download_url"]).path)
+            filename = target_dist["_filename"]
             
             filepath = dist_dir / filename
             
             # 检查文件是否已存在
             if filepath.exists():
-                print(f"文件已存在: {filepath}")
-                if verify_checksum:
-                    success, message = self.verify_checksum_smart(
-                        filepath, 
-                        target_dist.get("checksum_url"), 
-                        target_dist.get("checksum")
-                    )
-                    if success:
-                        print(f"✓ {message}")
-                        success_count += 1
-                        continue
-                    else:
-                        print(f"✗ {message}")
-                        print("校验和验证失败，将重新下载")
+                if self._get_resume_validator(filepath):
+                    # 上次下载中断留下的部分文件（记录了资源版本），通过If-Range续传
+                    print(f"发现未完成的下载: {filepath} ({filepath.stat().st_size} 字节)，将继续下载")
+                else:
+                    print(f"文件已存在: {filepath}")
+                    if verify_checksum:
+                        success, message = self.verify_checksum_smart(
+                            filepath, 
+                            target_dist.get("checksum_url"), 
+                            target_dist.get("checksum")
+                        )
+                        if success:
+                            print(f"✓ {message}")
+                            success_count += 1
+                            continue
+                        else:
+                            print(f"✗ {message}")
+                            print("校验和验证失败，将重新下载")
+                    filepath.unlink()
+                    self._set_resume_validator(filepath, None)
             
             # 开始下载
             print(f"开始下载 {name}: {filename}")
             print(f"下载链接: {target_dist['download_url']}")
             
             try:
-                response = requests.get(target_dist["download_url"], headers=self.headers, stream=True)
-                response.raise_for_status()
-                
-                total_size = int(response.headers.get('content-length', 0))
-                
-                # 使用tqdm创建进度条
-                with open(filepath, 'wb') as f:
-                    with tqdm(
-                        total=total_size,
-                        unit='B',
-                        unit_scale=True,
-                        unit_divisor=1024,
-                        desc=f"下载 {filename}",
-                        bar_format='{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]'
-                    ) as pbar:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                                pbar.update(len(chunk))
+                actual_checksum = self._download_file(
+                    target_dist["download_url"], filepath, filename, position
+                )
+                self._remember_sha256(filepath, actual_checksum)
                 
                 print(f"\n下载完成: {filepath}")
                 
@@ -288,7 +601,8 @@ class LinuxDistributionDownloader:
                     success, message = self.verify_checksum_smart(
                         filepath, 
                         target_dist.get("checksum_url"), 
-                        target_dist.get("checksum")
+                        target_dist.get("checksum"),
+                        precomputed_checksum=actual_checksum
                     )
                     if success:
                         print(f"✓ {message}")
@@ -299,9 +613,8 @@ class LinuxDistributionDownloader:
                     success_count += 1
                 
             except requests.exceptions.RequestException as e:
+                # 保留不完整的文件，下次运行时通过Range请求续传
                 print(f"\n下载失败: {e}")
-                if filepath.exists():
-                    filepath.unlink()  # 删除不完整的文件
         
         # 清理发行版目录，删除不在JSON中维护的文件
         if matching_dists:
@@ -315,43 +628,52 @@ class LinuxDistributionDownloader:
     def verify_checksum(self, filepath: Path, expected_checksum: str) -> bool:
         """验证文件的SHA256校验和"""
         try:
-            sha256_hash = hashlib.sha256()
-            with open(filepath, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(chunk)
-            
-            actual_checksum = sha256_hash.hexdigest()
+            actual_checksum = self._cached_sha256(filepath)
             return actual_checksum == expected_checksum
         except Exception as e:
             print(f"校验和验证错误: {e}")
             return False
     
-    def download_all(self, verify_checksum: bool = True) -> None:
-        """下载所有发行版"""
-        print("开始下载所有发行版...")
-        
-        # 按发行版名称分组
-        dist_groups = {}
-        for dist in self.distributions["distributions"]:
-            dist_name = dist["distribution"]
-            if dist_name not in dist_groups:
-                dist_groups[dist_name] = []
-            dist_groups[dist_name].append(dist)
-        
-        # 按分组下载，每个发行版只调用一次download_distribution
-        for dist_name, dists in dist_groups.items():
+    def _download_host_group(self, dist_names: List[str], verify_checksum: bool,
+                             position: int) -> int:
+        """串行下载同一镜像主机上的发行版，返回成功的发行版数量"""
+        success_count = 0
+        for dist_name in dist_names:
             print(f"\n{'='*60}")
             success = self.download_distribution(
-                dist_name, verify_checksum
+                dist_name, verify_checksum, position=position
             )
             
-            if not success:
+            if success:
+                success_count += 1
+            else:
                 print(f"下载失败: {dist_name}")
-            
-            time.sleep(2)  # 避免请求过于频繁
+        return success_count
+    
+    def download_all(self, verify_checksum: bool = True, max_workers: int = 8) -> None:
+        """下载所有发行版"""
+        print("开始下载所有发行版...")
+        
+        # 按镜像主机分组：不同主机并行下载，同一主机内串行，避免对同一镜像同时建立多个连接
+        host_groups: Dict[str, List[str]] = {}
+        for dists in self._by_name.values():
+            host = urlparse(dists[0]["download_url"]).hostname or ""
+            host_groups.setdefault(host, []).append(dists[0]["distribution"])
+        
+        workers = min(max_workers, len(host_groups)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    self._download_host_group, dist_names, verify_checksum, position
+                ): host
+                for position, (host, dist_names) in enumerate(host_groups.items())
+            }
+            success_count = 0
+            for future in as_completed(futures):
+                success_count += future.result()
         
         print(f"\n{'='*60}")
-        print("所有下载任务完成")
+        print(f"所有下载任务完成，成功 {success_count}/{len(self._by_name)} 个发行版")
 
 
 def main():
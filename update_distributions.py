@@ -8,14 +8,29 @@ discovers the latest artifacts per distribution, and rewrites distributions.json
 from __future__ import annotations
 
 import argparse
+import functools
+import hashlib
 import json
+import os
 import re
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
-from urllib.parse import urljoin
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:  # Optional: HTTP/2 multiplexing for the many small listing fetches.
+    import httpx
+    import h2  # noqa: F401  (required by httpx for http2=True)
+except ImportError:  # pragma: no cover - falls back to requests
+    httpx = None
 
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -23,6 +38,96 @@ DEFAULT_HEADERS = {
     "Chrome/120.0.0.0 Safari/537.36",
 }
 
+# Retry policy for transient HTTP statuses, shared by the requests and httpx paths.
+RETRY_TOTAL = 5
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _build_session() -> requests.Session:
+    """Create a shared session so listing fetches reuse pooled connections."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _build_http2_client() -> Optional["httpx.Client"]:
+    """Create an HTTP/2 client so listings on one host share a multiplexed connection."""
+    if httpx is None:
+        return None
+    transport = httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    )
+    return httpx.Client(
+        transport=transport,
+        headers=DEFAULT_HEADERS,
+        timeout=30,
+        follow_redirects=True,
+    )
+
+
+# Both clients expose get(url, headers=..., timeout=...) returning a response with
+# status_code, headers, text and raise_for_status(), which is all fetch_text needs.
+_HTTP_CLIENT = _build_http2_client() or _build_session()
+
+
+def _retry_delay(response, attempt: int) -> float:
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF_FACTOR * (2 ** attempt)
+
+
+def _http_get(url: str, headers: Optional[Dict[str, str]] = None):
+    """GET through the shared client, retrying 429/5xx with backoff.
+
+    The requests adapter already does this via urllib3's Retry; httpx transports
+    only retry failed connections, so status retries are applied here instead.
+    """
+    if httpx is None or not isinstance(_HTTP_CLIENT, httpx.Client):
+        return _HTTP_CLIENT.get(url, headers=headers, timeout=30)
+    for attempt in range(RETRY_TOTAL + 1):
+        response = _HTTP_CLIENT.get(url, headers=headers, timeout=30)
+        if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+            return response
+        response.close()
+        time.sleep(_retry_delay(response, attempt))
+    return response
+
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+
+_NATURAL_SPLIT_RE = re.compile(r"(\d+)")
+
+# Upper bound on concurrent listing fetches (across sources and sub-listings).
+MAX_FETCH_WORKERS = 16
+# Upper bound on in-flight listing fetches against a single mirror host.
+MAX_FETCH_PER_HOST = 4
+
+_HOST_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_HOST_SLOTS_LOCK = threading.Lock()
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc.lower()
+    with _HOST_SLOTS_LOCK:
+        slot = _HOST_SLOTS.get(host)
+        if slot is None:
+            slot = _HOST_SLOTS[host] = threading.BoundedSemaphore(MAX_FETCH_PER_HOST)
+        return slot
+
 
 class SourceBuilderError(RuntimeError):
     """Raised when a source definition cannot be processed."""
@@ -52,6 +157,17 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print the generated JSON without writing to disk.",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory for cached listings and their ETag/Last-Modified "
+        "validators (default: .cache next to this script). Read-only under --dry-run.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always download listings in full, ignoring the listing cache.",
+    )
     return parser.parse_args()
 
 
@@ -64,14 +180,126 @@ def load_config(path: Path) -> List[Dict]:
     return sources
 
 
+def _write_text_atomic(path: Path, text: str) -> None:
+    """Write via a unique sibling temp file and os.replace, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with open(fd, "w", encoding="utf-8") as fp:
+            fp.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class ListingCache:
+    """On-disk cache of listing bodies keyed by URL, revalidated via ETag/Last-Modified."""
+
+    INDEX_NAME = "listing_etags.json"
+
+    def __init__(self, directory: Path, read_only: bool = False) -> None:
+        self.directory = directory
+        self.read_only = read_only
+        self.index_path = directory / self.INDEX_NAME
+        self._lock = threading.Lock()
+        try:
+            with self.index_path.open("r", encoding="utf-8") as fp:
+                self._index: Dict[str, Dict[str, str]] = json.load(fp)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def _body_path(self, url: str) -> Path:
+        return self.directory / (hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+    def fetch(self, url: str) -> str:
+        with self._lock:
+            entry = dict(self._index.get(url, {}))
+        body_path = self._body_path(url)
+        headers: Dict[str, str] = {}
+        if entry and body_path.exists():
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = _http_get(url, headers=headers)
+        if response.status_code == 304 and headers:
+            try:
+                return body_path.read_text(encoding="utf-8")
+            except FileNotFoundError:
+                # Another thread dropped the entry meanwhile; fetch the body in full.
+                response = _http_get(url)
+        response.raise_for_status()
+        text = response.text
+        validators = {
+            key: response.headers[header]
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+            if response.headers.get(header)
+        }
+        if self.read_only:
+            return text
+        if validators:
+            _write_text_atomic(body_path, text)
+            with self._lock:
+                self._index[url] = validators
+        else:
+            # The server stopped sending validators; forget the stale entry.
+            with self._lock:
+                self._index.pop(url, None)
+            body_path.unlink(missing_ok=True)
+        return text
+
+    def save(self) -> None:
+        if self.read_only:
+            return
+        with self._lock:
+            if not self._index and not self.index_path.exists():
+                return
+            _write_text_atomic(
+                self.index_path,
+                json.dumps(self._index, ensure_ascii=False, indent=2, sort_keys=True),
+            )
+
+
+# Set by main(); when None every listing is downloaded in full.
+_LISTING_CACHE: Optional[ListingCache] = None
+
+
 def fetch_text(url: str) -> str:
-    response = requests.get(url, headers=DEFAULT_HEADERS, timeout=30)
-    response.raise_for_status()
-    return response.text
+    with _host_slot(url):
+        if _LISTING_CACHE is not None:
+            return _LISTING_CACHE.fetch(url)
+        response = _http_get(url)
+        response.raise_for_status()
+        return response.text
 
 
+def fetch_many(urls: Iterable[str]) -> Dict[str, Union[str, Exception]]:
+    """Fetch several listings concurrently, keeping per-URL failures as values."""
+
+    def fetch(url: str) -> Union[str, Exception]:
+        try:
+            return fetch_text(url)
+        except Exception as exc:
+            return exc
+
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    workers = min(MAX_FETCH_WORKERS, len(unique_urls))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(unique_urls, executor.map(fetch, unique_urls)))
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern: str) -> re.Pattern:
+    """Compile a regex once and reuse it across sources sharing the same pattern."""
+    return re.compile(pattern)
+
+
+@functools.lru_cache(maxsize=4096)
 def natural_key(value: str) -> Tuple:
-    parts = re.split(r"(\d+)", value)
+    parts = _NATURAL_SPLIT_RE.split(value)
     key: List = []
     for part in parts:
         if part.isdigit():
@@ -110,7 +338,7 @@ def build_from_dated_directory(source: Dict) -> List[Dict]:
     listing_url: str = source["listing_url"]
     version_regex: str = source["version_regex"]
     html = fetch_text(listing_url)
-    pattern = re.compile(version_regex)
+    pattern = _compile(version_regex)
     matches = pattern.finditer(html)
     values: List[str] = []
     for match in matches:
@@ -123,7 +351,7 @@ def build_from_dated_directory(source: Dict) -> List[Dict]:
     entries: List[Dict] = []
     overrides = source.get("overrides", [])
     override_patterns = [
-        (re.compile(rule["pattern"]), rule)
+        (_compile(rule["pattern"]), rule)
         for rule in overrides
         if "pattern" in rule
     ]
@@ -162,7 +390,7 @@ def build_from_flat_listing(source: Dict) -> List[Dict]:
     listing_url: str = source["listing_url"]
     artifact_regex: str = source["artifact_regex"]
     html = fetch_text(listing_url)
-    pattern = re.compile(artifact_regex)
+    pattern = _compile(artifact_regex)
     matches = []
     for match in pattern.finditer(html):
         primary, groups = get_primary_match(match)
@@ -233,7 +461,7 @@ def build_from_versioned_flat_listing(source: Dict) -> List[Dict]:
     version_regex: str = source["version_regex"]
     sub_listing_template: str = source["sub_listing_template"]
     html = fetch_text(base_listing)
-    pattern = re.compile(version_regex)
+    pattern = _compile(version_regex)
     matches = pattern.finditer(html)
     versions: List[str] = []
     for match in matches:
@@ -244,15 +472,23 @@ def build_from_versioned_flat_listing(source: Dict) -> List[Dict]:
     if isinstance(max_entries, int) and max_entries > 0:
         versions = versions[:max_entries]
 
-    artifact_pattern = re.compile(source["artifact_regex"])
+    artifact_pattern = _compile(source["artifact_regex"])
     max_artifacts = source.get("max_artifacts", 1)
     entries: List[Dict] = []
     per_version_failures: List[str] = []
+    sub_listing_urls = {
+        version: format_template(
+            sub_listing_template, {"version": version, "listing_url": base_listing}
+        )
+        for version in versions
+    }
+    bodies = fetch_many(sub_listing_urls.values())
     for version in versions:
-        context = {"version": version, "listing_url": base_listing}
-        sub_listing_url = format_template(sub_listing_template, context)
+        sub_listing_url = sub_listing_urls[version]
         try:
-            artifact_html = fetch_text(sub_listing_url)
+            artifact_html = bodies[sub_listing_url]
+            if isinstance(artifact_html, Exception):
+                raise artifact_html
             artifact_matches = []
             for match in artifact_pattern.finditer(artifact_html):
                 primary, groups = get_primary_match(match)
@@ -321,6 +557,7 @@ def build_entries(source: Dict) -> List[Dict]:
 
 
 def main() -> None:
+    global _LISTING_CACHE
     args = parse_args()
     config_path = Path(args.config)
     output_path = Path(args.output)
@@ -328,17 +565,27 @@ def main() -> None:
         sources = load_config(config_path)
     except Exception as exc:
         raise SystemExit(f"Failed to load config: {exc}") from exc
+    if not args.no_cache:
+        _LISTING_CACHE = ListingCache(Path(args.cache_dir), read_only=args.dry_run)
 
     all_entries: List[Dict] = []
     failures: List[str] = []
-    for source in sources:
+    with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+        futures = [executor.submit(build_entries, source) for source in sources]
+    for source, future in zip(sources, futures):
         name = source.get("distribution", "unknown")
         try:
-            all_entries.extend(build_entries(source))
+            all_entries.extend(future.result())
         except Exception as exc:
             failures.append(f"{name}: {exc}")
             print(f"[WARN] Skipping {name}: {exc}", file=sys.stderr)
 
+    if _LISTING_CACHE is not None:
+        try:
+            _LISTING_CACHE.save()
+        except OSError as exc:
+            print(f"[WARN] Could not save listing cache: {exc}", file=sys.stderr)
+
     if not all_entries:
         raise SystemExit("No distribution entries were generated.")
 
@@ -347,12 +594,23 @@ def main() -> None:
     json_kwargs = {"ensure_ascii": False}
     if args.pretty:
         json_kwargs["indent"] = 2
-    output_data = json.dumps(payload, **json_kwargs)
 
     if args.dry_run:
-        print(output_data)
+        json.dump(payload, sys.stdout, **json_kwargs)
+        sys.stdout.write("\n")
     else:
-        output_path.write_text(output_data + ("\n" if args.pretty else ""), encoding="utf-8")
+        # Serialize into a sibling temp file so a failure never truncates the
+        # existing output; os.replace swaps it in atomically.
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+        try:
+            with tmp_path.open("w", encoding="utf-8") as fp:
+                json.dump(payload, fp, **json_kwargs)
+                if args.pretty:
+                    fp.write("\n")
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
         print(f"Wrote {len(all_entries)} entries to {output_path}")
 
     if failures: